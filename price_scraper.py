@@ -1,13 +1,154 @@
 # Price Scraper and Currency Converter
+import asyncio
+import csv
+import math
+import re
 import requests
-from bs4 import BeautifulSoup
+import requests_cache
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urljoin
+from selectolax.lexbor import LexborHTMLParser
+import numpy as np
 import pandas as pd
-import json
+import orjson
 import time
 from datetime import datetime
+import matplotlib
+matplotlib.use('Agg')  # Charts are only saved to file, so skip GUI backend selection
 import matplotlib.pyplot as plt
 import sys
 
+# books.toscrape.com lists 20 products per catalogue page
+PRODUCTS_PER_PAGE = 20
+
+# Upper bound on simultaneous page downloads
+MAX_CONCURRENT_REQUESTS = 16
+
+# Matches the number in a price string, ignoring currency symbols and abbreviations
+# around it; thousands separators are allowed and removed before conversion
+PRICE_RE = re.compile(r'\d[\d,]*(?:\.\d+)?')
+
+# The catalogue pager reads 'Page 1 of N'; N caps how many pages are worth requesting
+PAGER_SELECTOR = 'ul.pager li.current'
+PAGE_COUNT_RE = re.compile(r'of\s+(\d+)')
+
+# Selects each product container together with its name link and detail paragraphs
+PRODUCT_FIELDS_SELECTOR = 'article.product_pod, article.product_pod h3 a, article.product_pod p'
+
+# Terminal chart bars, prebuilt for every length up to the cap
+MAX_ASCII_BAR_LENGTH = 499
+ASCII_BARS = ['█' * length for length in range(MAX_ASCII_BAR_LENGTH + 1)]
+
+# Product data is kept column-wise (one list or array per field) rather than as
+# one record per product, so each pipeline step works on whole columns at once
+PRODUCT_COLUMNS = ('name', 'original_price', 'original_currency', 'rating', 'availability')
+
+def _to_list(values):
+    """
+    Return a product column as a plain list of Python values.
+    
+    Args:
+        values (list or numpy.ndarray): The column to convert
+    
+    Returns:
+        list: The column values
+    """
+    return values.tolist() if isinstance(values, np.ndarray) else list(values)
+
+def _count_catalogue_pages(html):
+    """
+    Read the total number of catalogue pages from a page's pager.
+    
+    Args:
+        html (bytes): The raw HTML content of a catalogue page
+    
+    Returns:
+        int: The number of catalogue pages (1 if the page has no pager)
+    """
+    pager = LexborHTMLParser(html).css_first(PAGER_SELECTOR)
+    match = PAGE_COUNT_RE.search(pager.text()) if pager is not None else None
+    return int(match.group(1)) if match else 1
+
+def _extract_products(html, max_products):
+    """
+    Extract product information from a single catalogue page.
+    
+    Args:
+        html (bytes): The raw HTML content of the page
+        max_products (int): Maximum number of products to extract
+    
+    Returns:
+        dict: Product columns, one list per field in PRODUCT_COLUMNS
+    """
+    products = {column: [] for column in PRODUCT_COLUMNS}
+    
+    # Parse the HTML content using selectolax's Lexbor (C) parser
+    tree = LexborHTMLParser(html)
+    
+    # The website uses 'article' tags with class 'product_pod' for each product.
+    # One document-wide query returns every product container followed by the
+    # elements we need from it, in document order, so each product's fields are
+    # grouped without running a separate query per container: the h3 link is
+    # the name and paragraphs are keyed by each of their classes
+    product_elements = []
+    for element in tree.css(PRODUCT_FIELDS_SELECTOR):
+        if element.tag == 'article':
+            elements = {}
+            product_elements.append(elements)
+        elif element.tag == 'a':
+            elements.setdefault('name', element)
+        else:
+            for css_class in (element.attributes.get('class') or '').split():
+                elements.setdefault(css_class, element)
+    
+    # Extract information from each product's elements, checking for
+    # missing elements explicitly rather than catching exceptions
+    for i, elements in enumerate(product_elements):
+        if len(products['name']) >= max_products:
+            break
+        
+        # Extract product name from the anchor link inside the h3 tag
+        name_element = elements.get('name')
+        if name_element is None:
+            print(f"Error processing product {i+1}: no product name found")
+            continue
+        product_name = name_element.attributes.get('title') or 'Unknown Product'
+        
+        # Extract price from the price_color class
+        # Books.toscrape.com uses GBP (£) as default currency
+        original_currency = 'GBP'
+        price_element = elements.get('price_color')
+        if price_element is not None:
+            # Pick the number out of the price text and convert it to float
+            price_text = price_element.text(strip=True)
+            price_match = PRICE_RE.search(price_text)
+            if price_match is None:
+                print(f"Error processing product {i+1}: unreadable price {price_text!r}")
+                continue
+            price_value = float(price_match.group().replace(',', ''))
+        else:
+            price_value = 0.0
+        
+        # Extract rating from the star-rating class
+        rating_element = elements.get('star-rating')
+        rating_classes = rating_element.attributes['class'].split() if rating_element is not None else []
+        rating = rating_classes[1] if len(rating_classes) > 1 else 'No rating'
+        
+        # Extract availability information
+        availability_element = elements.get('availability')
+        availability = availability_element.text(strip=True) if availability_element is not None else 'Unknown'
+        
+        # Add all extracted information to the product columns
+        products['name'].append(product_name)
+        products['original_price'].append(price_value)
+        products['original_currency'].append(original_currency)
+        products['rating'].append(rating)
+        products['availability'].append(availability)
+    
+    return products
+
 class PriceScraper:
     """
     A web scraper class that extracts product information from websites
@@ -24,11 +165,19 @@ class PriceScraper:
         self.base_url = base_url
         
         # Create a session for making HTTP requests with custom headers
-        self.session = requests.Session()
+        # Responses are cached on disk for an hour so repeated runs skip the network
+        self.session = requests_cache.CachedSession('pyscraper_cache', backend='sqlite', expire_after=3600)
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         })
         
+        # Keep enough pooled connections for concurrent page fetches and retry
+        # transient server errors with exponential backoff
+        retry = Retry(total=3, backoff_factor=0.3, status_forcelist=[500, 502, 503, 504])
+        adapter = HTTPAdapter(pool_connections=32, pool_maxsize=32, max_retries=retry)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        
         # Mock exchange rates (in real scenario, you'd use an API like exchangerate-api.com)
         # These rates represent the conversion from USD to other currencies
         self.exchange_rates = {
@@ -62,10 +211,11 @@ class PriceScraper:
                 return 1.0
             
             # Convert through USD as base currency
+            rates = self.exchange_rates  # Local binding avoids repeated attribute lookups
             # Get the rate from source currency to USD
-            usd_from = self.exchange_rates.get(from_currency, 1.0)
+            usd_from = rates.get(from_currency, 1.0)
             # Get the rate from USD to target currency
-            usd_to = self.exchange_rates.get(to_currency, 1.0)
+            usd_to = rates.get(to_currency, 1.0)
             
             # Calculate the cross-rate
             return usd_to / usd_from
@@ -74,136 +224,162 @@ class PriceScraper:
             print(f"Error getting exchange rate: {e}")
             return 1.0  # Return 1.0 as fallback
     
+    def _fetch_page(self, url):
+        """
+        Fetch a single page with the shared session.
+        
+        Args:
+            url (str): The page URL to fetch
+            
+        Returns:
+            bytes: The raw HTML content of the page
+        """
+        response = self.session.get(url, timeout=10)
+        response.raise_for_status()  # Raise exception for bad status codes
+        return response.content
+    
+    async def _scrape_pages(self, urls, max_products):
+        """
+        Fetch catalogue pages concurrently and extract their products.
+        
+        Blocking requests run on a bounded thread pool so the page
+        downloads overlap instead of paying one round-trip each. Each
+        page is parsed as soon as it arrives; parsing takes well under a
+        millisecond per page, so it stays on the event loop.
+        
+        Args:
+            urls (list): Page URLs to scrape
+            max_products (int): Maximum number of products to scrape from these pages
+            
+        Returns:
+            list: Products for each URL, or the exception raised scraping it
+        """
+        loop = asyncio.get_running_loop()
+        
+        # The thread pool size caps how many requests are in flight at once
+        with ThreadPoolExecutor(max_workers=MAX_CONCURRENT_REQUESTS) as fetch_executor:
+            async def scrape(url, limit):
+                html = await loop.run_in_executor(fetch_executor, self._fetch_page, url)
+                return _extract_products(html, limit)
+            
+            # Earlier pages cover the first products, so later pages only need what's left
+            scrapes = [scrape(url, max_products - page * PRODUCTS_PER_PAGE) for page, url in enumerate(urls)]
+            return await asyncio.gather(*scrapes, return_exceptions=True)
+    
     def scrape_products(self, max_products=10):
         """
         Scrape product information from the website.
         
+        The first catalogue page is fetched on its own to read the total
+        page count; the rest of the pages needed to reach max_products
+        (up to that count) are then fetched concurrently and parsed as they arrive.
+        
         Args:
             max_products (int): Maximum number of products to scrape
             
         Returns:
-            list: List of dictionaries containing product information
+            dict: Product columns keyed by field name, with prices as a
+            float64 NumPy array, or an empty dict if nothing was scraped
         """
-        products = []
+        products = {column: [] for column in PRODUCT_COLUMNS}
         
         try:
-            # Make HTTP request to the website
+            # Make HTTP requests to the website, starting with the first catalogue page
             print(f"Connecting to {self.base_url}...")
-            response = self.session.get(self.base_url, timeout=10)
-            response.raise_for_status()  # Raise exception for bad status codes
-            
-            # Parse the HTML content using BeautifulSoup
-            soup = BeautifulSoup(response.content, 'html.parser')
+            first_url = urljoin(self.base_url, 'catalogue/page-1.html')
+            try:
+                first_page = self._fetch_page(first_url)
+            except requests.RequestException as e:
+                print(f"Connection error for {first_url}: {e}")
+                return {}
             
-            # Find all product containers on the page
-            # The website uses 'article' tags with class 'product_pod' for each product
-            product_containers = soup.find_all('article', class_='product_pod')
+            # Work out which catalogue pages are needed for the requested product count,
+            # never asking for more pages than the catalogue has
+            num_pages = min(max(1, math.ceil(max_products / PRODUCTS_PER_PAGE)),
+                            _count_catalogue_pages(first_page))
+            urls = [urljoin(self.base_url, f'catalogue/page-{page}.html') for page in range(2, num_pages + 1)]
             
-            print(f"Found {len(product_containers)} products on the page")
+            pages = [_extract_products(first_page, max_products)]
+            if urls:
+                pages += asyncio.run(self._scrape_pages(urls, max_products - PRODUCTS_PER_PAGE))
             
-            # Extract information from each product container
-            for i, container in enumerate(product_containers):
-                if len(products) >= max_products:
-                    break
-                
-                try:
-                    # Extract product name from the h3 tag and its anchor link
-                    name_element = container.find('h3').find('a')
-                    product_name = name_element.get('title', 'Unknown Product')
-                    
-                    # Extract price from the price_color class
-                    price_element = container.find('p', class_='price_color')
-                    if price_element:
-                        price_text = price_element.text.strip()
-                        # Remove currency symbols and convert to float
-                        # Books.toscrape.com uses GBP (£) as default currency
-                        price_value = float(price_text.replace('£', '').replace('$', '').replace('€', ''))
-                        original_currency = 'GBP'  # Books.toscrape uses GBP
-                    else:
-                        price_value = 0.0
-                        original_currency = 'GBP'
-                    
-                    # Extract rating from the star-rating class
-                    rating_element = container.find('p', class_='star-rating')
-                    rating = rating_element.get('class')[1] if rating_element else 'No rating'
-                    
-                    # Extract availability information
-                    availability_element = container.find('p', class_='availability')
-                    availability = availability_element.text.strip() if availability_element else 'Unknown'
-                    
-                    # Create product dictionary with all extracted information
-                    products.append({
-                        'name': product_name,
-                        'original_price': price_value,
-                        'original_currency': original_currency,
-                        'rating': rating,
-                        'availability': availability
-                    })
-                    
-                except Exception as e:
-                    print(f"Error processing product {i+1}: {e}")
+            for url, page_products in zip([first_url] + urls, pages):
+                if isinstance(page_products, requests.HTTPError):
+                    # A missing page means the catalogue has ended, so later pages are missing too
+                    if page_products.response is not None and page_products.response.status_code == 404:
+                        print(f"No more catalogue pages after {len(products['name'])} products")
+                        break
+                    print(f"HTTP error for {url}: {page_products}")
                     continue
+                if isinstance(page_products, requests.RequestException):
+                    print(f"Connection error for {url}: {page_products}")
+                    continue
+                if isinstance(page_products, Exception):
+                    raise page_products
+                
+                print(f"Found {len(page_products['name'])} products on {url}")
+                for column, values in page_products.items():
+                    products[column].extend(values)
+            
+            # Later pages may push the total past the requested count
+            products = {column: values[:max_products] for column, values in products.items()}
+            products['original_price'] = np.array(products['original_price'], dtype=np.float64)
             
-            print(f"Successfully scraped {len(products)} products")
-            return products
+            num_products = len(products['name'])
+            print(f"Successfully scraped {num_products} products")
+            return products if num_products else {}
             
-        except requests.RequestException as e:
-            print(f"Connection error: {e}")
-            return []
         except Exception as e:
             print(f"Error scraping products: {e}")
-            return []
+            return {}
     
     def convert_prices(self, products, target_currency='KES'):
         """
         Convert prices from original currency to target currency.
         
         Args:
-            products (list): List of product dictionaries
+            products (dict): Product columns keyed by field name
             target_currency (str): Currency code to convert prices to
             
         Returns:
-            list: List of products with converted prices
+            dict: Product columns with the converted price columns added
         """
-        converted_products = []
         timestamp = datetime.now().isoformat()  # Current timestamp for tracking
         
         print(f"Converting prices to {target_currency}...")
         
-        for product in products:
-            try:
-                original_price = product['original_price']
-                original_currency = product['original_currency']
-                
-                # Get exchange rate for conversion
-                exchange_rate = self.get_exchange_rate(original_currency, target_currency)
-                
-                # Convert price using the exchange rate
-                converted_price = original_price * exchange_rate
-                
-                # Create new product dictionary with converted price information
-                converted_product = {
-                    **product,  # Include all original product data
-                    'converted_price': round(converted_price, 2),
-                    'target_currency': target_currency,
-                    'exchange_rate': round(exchange_rate, 4),
-                    'conversion_timestamp': timestamp
-                }
-                
-                converted_products.append(converted_product)
-                
-            except Exception as e:
-                print(f"Error converting price for {product.get('name', 'Unknown')}: {e}")
-                continue
+        if not products:
+            return {}
+        
+        # Every scraped product shares the same source currency, so the
+        # exchange rate only needs to be looked up once per run
+        exchange_rate = self.get_exchange_rate(products['original_currency'][0], target_currency)
+        
+        # Validate all prices up front so the conversion itself can run as one array operation
+        try:
+            original_prices = np.asarray(products['original_price'], dtype=np.float64)
+        except (KeyError, TypeError, ValueError) as e:
+            print(f"Error converting prices: {e}")
+            return {}
+        
+        num_products = len(original_prices)
         
-        return converted_products
+        # Convert all prices with a single vectorized multiply and add the
+        # conversion details, which are the same for every product
+        return {
+            **products,  # Include all original product data
+            'converted_price': np.round(original_prices * exchange_rate, 2),
+            'target_currency': [target_currency] * num_products,
+            'exchange_rate': [round(exchange_rate, 4)] * num_products,
+            'conversion_timestamp': [timestamp] * num_products
+        }
     
     def save_to_csv(self, products, filename=None):
         """
-        Save products data to a CSV file using pandas.
+        Save products data to a CSV file.
         
         Args:
-            products (list): List of product dictionaries
+            products (dict): Product columns keyed by field name
             filename (str): Name of the CSV file to save (optional)
         """
         try:
@@ -212,10 +388,12 @@ class PriceScraper:
                 timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
                 filename = f'products_with_converted_prices_{timestamp}.csv'
             
-            # Convert list of dictionaries to pandas DataFrame
-            df = pd.DataFrame(products)
-            # Save DataFrame to CSV file
-            df.to_csv(filename, index=False)
+            # Write the columns straight to the CSV file, one row per product
+            columns = [_to_list(values) for values in products.values()]
+            with open(filename, 'w', newline='', encoding='utf-8') as f:
+                writer = csv.writer(f)
+                writer.writerow(products.keys())
+                writer.writerows(zip(*columns))
             print(f"Data saved to {filename}")
         except Exception as e:
             print(f"Error saving to CSV: {e}")
@@ -225,7 +403,7 @@ class PriceScraper:
         Save products data to a JSON file.
         
         Args:
-            products (list): List of product dictionaries
+            products (dict): Product columns keyed by field name
             filename (str): Name of the JSON file to save (optional)
         """
         try:
@@ -234,9 +412,13 @@ class PriceScraper:
                 timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
                 filename = f'products_with_converted_prices_{timestamp}.json'
             
-            # Write data to JSON file with proper formatting
-            with open(filename, 'w', encoding='utf-8') as f:
-                json.dump(products, f, indent=2, ensure_ascii=False)
+            # Keep the file as a list of product objects for readers of the JSON
+            columns = [_to_list(values) for values in products.values()]
+            records = [dict(zip(products.keys(), row)) for row in zip(*columns)]
+            
+            # Write data to JSON file with proper formatting (orjson always emits UTF-8)
+            with open(filename, 'wb') as f:
+                f.write(orjson.dumps(records, option=orjson.OPT_INDENT_2))
             print(f"Data saved to {filename}")
         except Exception as e:
             print(f"Error saving to JSON: {e}")
@@ -246,34 +428,25 @@ class PriceScraper:
         Display products in a formatted table using pandas.
         
         Args:
-            products (list): List of product dictionaries to display
+            products (dict): Product columns to display
         """
         if not products:
             print("No products to display")
             return
         
-        # Create a DataFrame for better display
-        df = pd.DataFrame(products)
-        
-        # Select and rename columns for display
-        display_df = df[['name', 'original_price', 'original_currency', 'converted_price', 'target_currency', 'rating', 'availability']].copy()
-        
-        # Truncate long product names for better display
-        def truncate_name(name):
-            return name[:50] + '...' if len(name) > 50 else name
-        
-        # Use list comprehension instead of map for better compatibility
-        display_df['name'] = [truncate_name(name) for name in display_df['name']]
-        
-        # Format price columns for better readability
-        display_df['original_price'] = display_df['original_price'].astype(str) + ' ' + display_df['original_currency']
-        display_df['converted_price'] = display_df['converted_price'].astype(str) + ' ' + display_df['target_currency']
-        
-        # Drop the currency columns since they're now combined with prices
-        display_df = display_df.drop(['original_currency', 'target_currency'], axis=1)
-        
-        # Rename columns for better display
-        display_df.columns = ['Product Name', 'Original Price', 'Converted Price', 'Rating', 'Availability']
+        # Build the display columns straight from the product columns, truncating
+        # long product names with vectorized string operations and combining
+        # prices with their currencies
+        names = pd.Series(products['name'])
+        display_df = pd.DataFrame({
+            'Product Name': names.str.slice(0, 50) + np.where(names.str.len() > 50, '...', ''),
+            'Original Price': [f"{price} {currency}" for price, currency
+                               in zip(_to_list(products['original_price']), products['original_currency'])],
+            'Converted Price': [f"{price} {currency}" for price, currency
+                                in zip(_to_list(products['converted_price']), products['target_currency'])],
+            'Rating': products['rating'],
+            'Availability': products['availability'],
+        })
         
         # Display formatted table
         print("\n" + "="*100)
@@ -287,7 +460,7 @@ class PriceScraper:
         Create a bar chart comparing original vs converted prices using matplotlib.
         
         Args:
-            products (list): List of product dictionaries with price information
+            products (dict): Product columns with price information
         """
         if not products:
             print("No products to plot")
@@ -295,24 +468,23 @@ class PriceScraper:
         
         try:
             # Prepare data for plotting
-            names = [product['name'][:20] + '...' if len(product['name']) > 20 else product['name'] 
-                    for product in products]
-            original_prices = [product['original_price'] for product in products]
-            converted_prices = [product['converted_price'] for product in products]
+            names = [name[:20] + '...' if len(name) > 20 else name for name in products['name']]
+            original_prices = products['original_price']
+            converted_prices = products['converted_price']
             
             # Create the bar chart
-            x = range(len(names))
+            x = np.arange(len(names))
             width = 0.35  # Width of the bars
             
             # Create figure and axis
             fig, ax = plt.subplots(figsize=(15, 8))
             
             # Create bars for original and converted prices
-            bars1 = ax.bar([i - width/2 for i in x], original_prices, width, 
-                          label=f'Original ({products[0]["original_currency"]})', 
+            bars1 = ax.bar(x - width/2, original_prices, width, 
+                          label=f'Original ({products["original_currency"][0]})', 
                           color='skyblue', alpha=0.8)
-            bars2 = ax.bar([i + width/2 for i in x], converted_prices, width, 
-                          label=f'Converted ({products[0]["target_currency"]})', 
+            bars2 = ax.bar(x + width/2, converted_prices, width, 
+                          label=f'Converted ({products["target_currency"][0]})', 
                           color='lightcoral', alpha=0.8)
             
             # Customize the plot
@@ -324,20 +496,15 @@ class PriceScraper:
             ax.legend()
             
             # Add value labels on top of each bar
-            for bars in [bars1, bars2]:
-                for bar in bars:
-                    height = bar.get_height()
-                    ax.annotate(f'{height:.2f}',
-                              xy=(bar.get_x() + bar.get_width() / 2, height),
-                              xytext=(0, 3),
-                              textcoords="offset points",
-                              ha='center', va='bottom', fontsize=8)
+            ax.bar_label(bars1, fmt='%.2f', padding=3, fontsize=8)
+            ax.bar_label(bars2, fmt='%.2f', padding=3, fontsize=8)
             
             # Adjust layout and save the plot with timestamp
-            plt.tight_layout()
+            fig.tight_layout()
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             chart_filename = f'price_comparison_{timestamp}.png'
-            plt.savefig(chart_filename, dpi=300, bbox_inches='tight')
+            fig.savefig(chart_filename, dpi=100)
+            plt.close(fig)
             print(f"Price comparison chart saved as '{chart_filename}'")
             
             # Display ASCII art representation in terminal
@@ -345,18 +512,18 @@ class PriceScraper:
             print("PRICE COMPARISON CHART (Terminal View)")
             print("="*80)
             
-            for i, product in enumerate(products):
-                name = product['name'][:30] + '...' if len(product['name']) > 30 else product['name']
-                original = product['original_price']
-                converted = product['converted_price']
+            rows = zip(products['name'], _to_list(original_prices), _to_list(converted_prices),
+                       products['original_currency'], products['target_currency'])
+            for i, (name, original, converted, original_currency, target_currency) in enumerate(rows):
+                name = name[:30] + '...' if len(name) > 30 else name
                 
-                # Create simple bar representation using ASCII characters
-                original_bars = '█' * int(original * 2)
-                converted_bars = '█' * int(converted * 2)
+                # Create simple bar representation using prebuilt ASCII bars
+                original_bars = ASCII_BARS[min(int(original * 2), MAX_ASCII_BAR_LENGTH)]
+                converted_bars = ASCII_BARS[min(int(converted * 2), MAX_ASCII_BAR_LENGTH)]
                 
                 print(f"{i+1:2d}. {name}")
-                print(f"    Original ({product['original_currency']}):  {original:6.2f} {original_bars}")
-                print(f"    Converted ({product['target_currency']}): {converted:6.2f} {converted_bars}")
+                print(f"    Original ({original_currency}):  {original:6.2f} {original_bars}")
+                print(f"    Converted ({target_currency}): {converted:6.2f} {converted_bars}")
                 print()
             
             print("="*80)